@@ -1,8 +1,7 @@
 import pandas as pd
-import numpy as np
 from pathlib import Path
 from dotenv import load_dotenv
-from logging_util import setup_logger 
+from logging_util import setup_logger, LazyMessage
 
 # === Setup ===
 load_dotenv()
@@ -29,7 +28,7 @@ def parse_coverage_datetimes(df):
     for col in datetime_cols:
         if col in df.columns:
             df[col] = pd.to_datetime(df[col], errors="coerce")
-            logger.info(f"Converted {col} to datetime format")
+            logger.debug("Converted %s to datetime format", col)
 
     # Create new date-only columns
     if "coverage.datetimeFrom.utc" in df.columns:
@@ -53,17 +52,16 @@ def interpolate_openaq_data(df):
         'summary.max', 'summary.avg', 'summary.sd'
     ]
 
-    logger.info(f"Data before cleaning: {df.describe()}")
+    logger.debug("Data before cleaning: %s", LazyMessage(df.describe))
 
     # Setting datetime column as index
     df["from_local_date"] = pd.to_datetime(df["from_local_date"])
     df.set_index("from_local_date", inplace=True)
 
     # Replace negative values with NaN
-    for col in aqi_columns:
-        neg_count = (df[col] < 0).sum()
-        df[col] = df[col].where(df[col] >= 0, np.nan)
-        logger.info(f"{col}: {neg_count} negative values replaced with NaN")
+    negative = df[aqi_columns] < 0
+    df[aqi_columns] = df[aqi_columns].mask(negative)
+    logger.info("Negative values replaced with NaN: %s", negative.sum().to_dict())
 
     # Interpolate missing values
     df[aqi_columns] = df[aqi_columns].interpolate(method='time')
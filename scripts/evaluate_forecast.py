@@ -1,11 +1,11 @@
 from prophet.diagnostics import cross_validation, performance_metrics
 from prophet.plot import plot_cross_validation_metric
-from prophet import Prophet
 from pathlib import Path
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 from logging_util import setup_logger
+from prophet_config import build_prophet_model, load_station_config, station_config_path, CV_INITIAL, CV_PERIOD, CV_HORIZON
 
 # === Setup Logging ===
 logger = setup_logger("evaluate_forecast", "evaluate_forecast.log")
@@ -54,18 +54,20 @@ def evaluate_forecast(file):
         df = df[["to_local_date", "summary.avg"]].dropna()
         df.columns = ["ds", "y"]
 
-        model = Prophet(yearly_seasonality=True, 
-                        weekly_seasonality=True, 
-                        daily_seasonality=False, 
-                        seasonality_mode="additive",
-                        changepoint_prior_scale=0.1)
-        model.add_country_holidays(country_name='IN')
+        # A tuned config was chosen on these same CV folds, so its metrics are
+        # optimistic and not directly comparable with default-config runs
+        tuned = station_config_path(clean_name, FORECAST_FOLDER).exists()
+        if tuned:
+            logger.warning(f"{station_name} uses a config tuned on the same CV folds; metrics are optimistically biased")
+
+        model = build_prophet_model(load_station_config(clean_name, FORECAST_FOLDER))
         model.fit(df)
         logger.info(f"Model fitting completed for {station_name}")
 
         # Cross-validation to evaluate forecast accuracy
-        df_cv = cross_validation(model, initial='730 days', period='180 days', horizon='90 days')
+        df_cv = cross_validation(model, initial=CV_INITIAL, period=CV_PERIOD, horizon=CV_HORIZON)
         df_performance = performance_metrics(df_cv)
+        df_performance["config_source"] = "tuned_on_these_folds" if tuned else "default"
 
         # Create station-specific output folder
         station_folder = Path(FORECAST_FOLDER) / clean_name
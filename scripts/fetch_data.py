@@ -4,10 +4,11 @@ import datetime
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from logging_util import setup_logger
+from logging_util import setup_logger, ItemLogSampler
 
 # === Setup Logging ===
 logger = setup_logger("fetch_data", "fetch_data.log")
+page_log = ItemLogSampler(logger, interval=30)
 
 # === Load Environment Variables ===
 env_path = Path("config_template.env")
@@ -22,6 +23,24 @@ if not API_KEY:
 HEADERS = {"X-API-Key": API_KEY}
 BASE_LOCATION_URL = "https://api.openaq.org/v3/locations"
 BASE_SENSOR_URL = "https://api.openaq.org/v3/sensors"
+COMBINED_DATA_PATH = "data/openaq_combined_data.csv"
+
+# Fixed output schema for the combined sensor data. Every page is normalized and
+# reindexed to these columns, so batches can be appended as they arrive.
+COMBINED_COLUMNS = [
+    "value", "coordinates", "sensor_id", "flagInfo.hasFlags",
+    "parameter.id", "parameter.name", "parameter.units", "parameter.displayName",
+    "period.label", "period.interval",
+    "period.datetimeFrom.utc", "period.datetimeFrom.local",
+    "period.datetimeTo.utc", "period.datetimeTo.local",
+    "summary.min", "summary.q02", "summary.q25", "summary.median",
+    "summary.q75", "summary.q98", "summary.max", "summary.avg", "summary.sd",
+    "coverage.expectedCount", "coverage.expectedInterval",
+    "coverage.observedCount", "coverage.observedInterval",
+    "coverage.percentComplete", "coverage.percentCoverage",
+    "coverage.datetimeFrom.utc", "coverage.datetimeFrom.local",
+    "coverage.datetimeTo.utc", "coverage.datetimeTo.local"
+]
 
 
 # === Helper Functions ===
@@ -33,7 +52,7 @@ def fetch_paginated_data(url, params=None):
     while True:
         try:
             full_url = f"{url}?page={page}&limit={limit}"
-            logger.info(f"Fetching data from {full_url}")
+            logger.debug("Fetching data from %s", full_url)
             response = requests.get(full_url, headers=HEADERS, params=params)
 
             if response.status_code == 200:
@@ -42,7 +61,7 @@ def fetch_paginated_data(url, params=None):
                 if not results:
                     break
                 all_results.extend(results)
-                logger.info(f"Fetched page {page} from {url}, total results: {len(results)}")
+                page_log.info(url, "Fetched page %d from %s, total results: %d", page, url, len(results))
                 page += 1
             else:
                 logger.error(f"Failed to fetch data from {url} - Status Code: {response.status_code}")
@@ -55,41 +74,70 @@ def fetch_paginated_data(url, params=None):
     return all_results
 
 
-def normalize_sensor_data(sensor_ids):
-    all_sensor_data = []
+def normalize_sensor_data(sensor_ids, output_file=COMBINED_DATA_PATH):
+    """
+    Fetches daily measurements for each sensor and appends every page to a sibling
+    .partial file as soon as it arrives, so memory stays flat and a failed run leaves
+    a usable partial file. The partial file replaces output_file only once the loop
+    finishes with at least one record, so a failed or empty run keeps the last good
+    dataset. Returns the number of records written.
+    """
+    total_records = 0
+    dropped_columns = set()
+    partial_file = f"{output_file}.partial"
     params = {
         "datetime_from": "2020-01-01",
         "datetime_to": "2025-02-25",
         "limit": 1000
     }
 
-    for s_id in sensor_ids:
-        try:
-            logger.info(f"Fetching data for sensor ID: {s_id}")
-            page = 1
-            while True:
-                params["page"] = page
-                url = f"{BASE_SENSOR_URL}/{s_id}/measurements/daily"
-                response = requests.get(url, headers=HEADERS, params=params)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    if not data.get("results"):
-                        logger.info(f"No more data for sensor ID: {s_id} after page {page}")
+    os.makedirs(Path(output_file).parent, exist_ok=True)
+    with open(partial_file, "w", newline="", encoding="utf-8") as out:
+        pd.DataFrame(columns=COMBINED_COLUMNS).to_csv(out, index=False)
+
+        for s_id in sensor_ids:
+            try:
+                logger.info(f"Fetching data for sensor ID: {s_id}")
+                page = 1
+                while True:
+                    params["page"] = page
+                    url = f"{BASE_SENSOR_URL}/{s_id}/measurements/daily"
+                    response = requests.get(url, headers=HEADERS, params=params)
+
+                    if response.status_code == 200:
+                        data = response.json()
+                        if not data.get("results"):
+                            logger.debug("No more data for sensor ID: %s after page %d", s_id, page)
+                            break
+
+                        batch = pd.json_normalize(data["results"])
+                        batch["sensor_id"] = s_id
+
+                        # Columns outside the fixed schema are dropped; report each one once
+                        new_dropped = set(batch.columns) - set(COMBINED_COLUMNS) - dropped_columns
+                        if new_dropped:
+                            logger.warning(f"Dropping columns not in the output schema for sensor {s_id}: {sorted(new_dropped)}")
+                            dropped_columns |= new_dropped
+
+                        batch.reindex(columns=COMBINED_COLUMNS).to_csv(out, index=False, header=False)
+                        out.flush()
+                        total_records += len(batch)
+
+                        page += 1
+                        page_log.info("sensor_pages", "Fetched page %d for sensor ID: %s", page, s_id)
+                    else:
+                        logger.error(f"Failed to fetch sensor {s_id} on page {page} - Status Code: {response.status_code}")
                         break
-                    for record in data["results"]:
-                        record["sensor_id"] = s_id
-                        all_sensor_data.append(record)
-                    page += 1
-                    logger.info(f"Fetched page {page} for sensor ID: {s_id}")
-                else:
-                    logger.error(f"Failed to fetch sensor {s_id} on page {page} - Status Code: {response.status_code}")
-                    break
-        except Exception as e:
-            logger.error(f"Error fetching sensor {s_id}: {e}")
+            except Exception as e:
+                logger.error(f"Error fetching sensor {s_id}: {e}")
+
+    if total_records:
+        os.replace(partial_file, output_file)
+    else:
+        os.remove(partial_file)
 
-    logger.info(f"Completed fetching data for all sensors, total records: {len(all_sensor_data)}")
-    return pd.json_normalize(all_sensor_data)
+    logger.info(f"Completed fetching data for all sensors, total records: {total_records}")
+    return total_records
 
 
 def main():
@@ -135,12 +183,9 @@ def main():
         df_filtered.to_csv("data/locations.csv", index=False)
 
         # Step 3: Fetch and save sensor data
-        df_sensor_data = normalize_sensor_data(sensor_ids)
-        if not df_sensor_data.empty:
-            output_file = "data/openaq_combined_data.csv"
-            os.makedirs("data", exist_ok=True)
-            df_sensor_data.to_csv(output_file, index=False)
-            logger.info(f"Data saved to {output_file}")
+        total_records = normalize_sensor_data(sensor_ids, COMBINED_DATA_PATH)
+        if total_records:
+            logger.info(f"Data saved to {COMBINED_DATA_PATH}")
         else:
             logger.warning("No sensor data fetched.")
     except Exception as e:
@@ -1,8 +1,12 @@
-from prophet import Prophet
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
+import os
+import time
+from statistics import NormalDist
 from pathlib import Path
 from logging_util import setup_logger
+from prophet_config import build_prophet_model, load_station_config
 
 # === Setup Logging ===
 logger = setup_logger("forecast_data", "forecast_data.log")
@@ -12,6 +16,69 @@ STATION_FOLDER = "data/stations"
 OUTPUT_FOLDER = "outputs/forecasts_prophet"
 FORECAST_DAYS = 90
 
+# === Prediction settings ===
+# "full": Prophet's simulated intervals using UNCERTAINTY_SAMPLES draws
+# "fast": no simulation, point forecast only (no yhat_lower/yhat_upper)
+# "analytic": no simulation, intervals derived from in-sample residuals
+PREDICT_MODE = os.getenv("PREDICT_MODE", "full")
+UNCERTAINTY_SAMPLES = int(os.getenv("UNCERTAINTY_SAMPLES", "1000"))
+INTERVAL_WIDTH = 0.8
+COMPARE_PREDICT_MODES = os.getenv("COMPARE_PREDICT_MODES", "0") == "1"
+PREDICT_MODES = ("full", "fast", "analytic")
+
+if PREDICT_MODE not in PREDICT_MODES:
+    logger.error(f"Invalid PREDICT_MODE '{PREDICT_MODE}'. Expected one of {PREDICT_MODES}.")
+    raise ValueError(f"Unknown PREDICT_MODE '{PREDICT_MODE}'. Expected one of {PREDICT_MODES}.")
+
+def add_analytic_intervals(forecast, df, interval_width=INTERVAL_WIDTH):
+    """
+    Adds yhat_lower/yhat_upper as yhat +/- z * sigma, where sigma is the standard
+    deviation of the in-sample residuals. Much cheaper than simulating, but the
+    width does not grow with the forecast horizon.
+    """
+    fitted = forecast[["ds", "yhat"]].merge(df[["ds", "y"]], on="ds", how="inner")
+    sigma = np.std(fitted["y"] - fitted["yhat"], ddof=1)
+    z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+    forecast["yhat_lower"] = forecast["yhat"] - z * sigma
+    forecast["yhat_upper"] = forecast["yhat"] + z * sigma
+    return forecast
+
+def predict_forecast(model, future, df, mode=PREDICT_MODE, uncertainty_samples=UNCERTAINTY_SAMPLES):
+    """Runs model.predict in the given mode and returns the forecast frame."""
+    # Prophet reads uncertainty_samples at predict time, so it can be switched after fitting
+    original_samples = model.uncertainty_samples
+    model.uncertainty_samples = uncertainty_samples if mode == "full" else 0
+    try:
+        forecast = model.predict(future)
+    finally:
+        model.uncertainty_samples = original_samples
+
+    if mode == "analytic":
+        forecast = add_analytic_intervals(forecast, df, model.interval_width)
+    return forecast
+
+def compare_predict_modes(model, future, df, station_name):
+    """
+    Logs predict latency and mean interval width for every mode. Returns the summary
+    frame and the forecast for each mode, so the configured one can be reused.
+    """
+    results = []
+    forecasts = {}
+    for mode in PREDICT_MODES:
+        start = time.perf_counter()
+        forecast = predict_forecast(model, future, df, mode=mode)
+        elapsed = time.perf_counter() - start
+        forecasts[mode] = forecast
+
+        if "yhat_lower" in forecast.columns:
+            width = (forecast["yhat_upper"] - forecast["yhat_lower"]).mean()
+        else:
+            width = np.nan
+        results.append({"mode": mode, "seconds": elapsed, "mean_interval_width": width})
+        logger.info(f"{station_name} - predict mode '{mode}': {elapsed:.2f}s, mean interval width: {width:.2f}")
+
+    return pd.DataFrame(results), forecasts
+
 def forecast_station_prophet(station_file):
     try:
         station_name = Path(station_file).stem.replace("_", " ")
@@ -26,29 +93,37 @@ def forecast_station_prophet(station_file):
         df = df[["summary.avg"]].dropna().reset_index()
         df.columns = ["ds", "y"]
 
-        # Initialize and fit the model
-        model = Prophet(
-            yearly_seasonality=True,
-            weekly_seasonality=True,
-            daily_seasonality=False,
-            seasonality_mode="additive",
-            changepoint_prior_scale=0.1
+        # Initialize and fit the model, using the tuned config if one was saved
+        config = load_station_config(station_name.replace(" ", "_"), OUTPUT_FOLDER)
+        model = build_prophet_model(
+            config,
+            interval_width=INTERVAL_WIDTH,
+            uncertainty_samples=UNCERTAINTY_SAMPLES
         )
-        model.add_country_holidays(country_name='IN')
         model.fit(df)
-        logger.info(f"Model fitting complete for {station_name}")
+        logger.info(f"Model fitting complete for {station_name} with config {config}")
 
         # Create future data frame
         future = model.make_future_dataframe(periods=FORECAST_DAYS)
-        forecast = model.predict(future)
 
         # Create subfolder for each station
         station_folder = Path(OUTPUT_FOLDER) / station_name.replace(" ", "_")
         station_folder.mkdir(parents=True, exist_ok=True)
 
-        # Plot forecast
-        plt.figure(figsize=(10, 6))
-        model.plot(forecast)
+        # Predict once and merge actual values; plots and CSV share this frame
+        if COMPARE_PREDICT_MODES:
+            comparison, forecasts = compare_predict_modes(model, future, df, station_name)
+            comparison_path = station_folder / f"{station_name.replace(' ', '_')}_predict_modes.csv"
+            comparison.to_csv(comparison_path, index=False)
+            logger.info(f"Predict mode comparison saved for {station_name} at {comparison_path}")
+            forecast = forecasts[PREDICT_MODE]
+        else:
+            forecast = predict_forecast(model, future, df)
+        forecast = pd.merge(forecast, df[['ds', 'y']], on='ds', how='left')
+        logger.info(f"Prediction complete for {station_name} (mode: {PREDICT_MODE})")
+
+        # Plot forecast (interval band only when the frame carries one)
+        model.plot(forecast, uncertainty="yhat_lower" in forecast.columns, figsize=(10, 6))
         plt.title(f"90-Day AQI Forecast - {station_name}")
         plt.xlabel("Date")
         plt.ylabel("AQI")
@@ -60,7 +135,7 @@ def forecast_station_prophet(station_file):
         logger.info(f"Forecast plot saved for {station_name} at {plot_path}")
 
         # Plot components (trend, yearly, weekly)
-        model.plot_components(forecast)
+        model.plot_components(forecast, uncertainty=PREDICT_MODE == "full" and UNCERTAINTY_SAMPLES > 0)
         plt.title(f"Trend and Seasonality Components - {station_name}")
         
         component_path = station_folder / f"{station_name.replace(' ', '_')}_components.png"
@@ -68,9 +143,6 @@ def forecast_station_prophet(station_file):
         plt.close()
         logger.info(f"Component plot saved for {station_name} at {component_path}")
 
-        # Merge forecast with actual values (if available)
-        forecast = pd.merge(forecast, df[['ds', 'y']], on='ds', how='left')
-
         # Save the forecast data to CSV
         output_csv = station_folder / f"{station_name.replace(' ', '_')}_forecast.csv"
         forecast.to_csv(output_csv, index=False)
@@ -1,22 +1,115 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+import threading
+import time
 from pathlib import Path
 
 # Set the log directory
 LOG_DIR = "logs"
 Path(LOG_DIR).mkdir(parents=True, exist_ok=True)
 
-def setup_logger(name, log_file, level=logging.INFO):
-    """Function to set up a logger with a given name and file."""
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+# Logger level, e.g. DEBUG to include per-column and per-page detail
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
-    # Create a file handler
-    file_handler = logging.FileHandler(os.path.join(LOG_DIR, log_file))
-    file_handler.setFormatter(formatter)
+# Log every Nth per-item message (e.g. pages fetched in fetch_data)
+ITEM_LOG_EVERY = int(os.getenv("ITEM_LOG_EVERY", "50"))
 
-    # Create a logger and set level
+# One QueueListener per logger name; the file write happens on the listener's thread
+_listeners = {}
+_lock = threading.Lock()
+
+def setup_logger(name, log_file, level=None):
+    """
+    Function to set up a logger with a given name and file. Records are handed to a
+    queue and written by a background listener, so callers never block on file I/O.
+    The level defaults to the LOG_LEVEL environment variable (INFO if unset).
+    Calling it again with the same name returns the existing logger unchanged.
+    """
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    logger.addHandler(file_handler)
+
+    with _lock:
+        if name in _listeners:
+            return logger
+
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+        # Create a file handler, driven by the listener thread
+        file_handler = logging.FileHandler(os.path.join(LOG_DIR, log_file))
+        file_handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        _listeners[name] = listener
+
+        # Create a logger and set level
+        logger.setLevel(level or LOG_LEVEL)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     return logger
+
+@atexit.register
+def shutdown_loggers():
+    """Flushes all queued records and stops the listener threads."""
+    with _lock:
+        for listener in _listeners.values():
+            listener.stop()
+        _listeners.clear()
+
+class LazyMessage:
+    """
+    Defers building an expensive message until a handler formats it, so the work is
+    skipped whenever the level is disabled. Use with %-style logging:
+    logger.debug("Summary: %s", LazyMessage(df.describe))
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        return str(self.func(*self.args, **self.kwargs))
+
+class ItemLogSampler:
+    """
+    Rate-limits per-item messages from hot loops. A message under a given key is
+    emitted on the first call and then on every `every`-th call, or once
+    `interval` seconds have passed since the last emitted one. Messages below the
+    logger's level are dropped before any counting or formatting.
+    """
+
+    def __init__(self, logger, every=ITEM_LOG_EVERY, interval=None):
+        self.logger = logger
+        self.every = max(1, every)
+        self.interval = interval
+        self._counts = {}
+        self._last_emit = {}
+
+    def log(self, key, msg, *args, level=logging.INFO):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+
+        now = time.monotonic()
+        due = count % self.every == 0
+        if not due and self.interval is not None:
+            due = now - self._last_emit.get(key, float("-inf")) >= self.interval
+        if not due:
+            return
+
+        self._last_emit[key] = now
+        if count:
+            msg = f"{msg} (sampled, {count + 1} calls so far)"
+        self.logger.log(level, msg, *args)
+
+    def info(self, key, msg, *args):
+        self.log(key, msg, *args, level=logging.INFO)
+
+    def debug(self, key, msg, *args):
+        self.log(key, msg, *args, level=logging.DEBUG)
@@ -0,0 +1,59 @@
+import json
+from pathlib import Path
+from prophet import Prophet
+
+# === Configuration ===
+FORECAST_FOLDER = "outputs/forecasts_prophet"
+
+# Cross-validation windows shared by evaluation and tuning
+CV_INITIAL = "730 days"
+CV_PERIOD = "180 days"
+CV_HORIZON = "90 days"
+
+# Model settings used when a station has no tuned config
+DEFAULT_PROPHET_CONFIG = {
+    "changepoint_prior_scale": 0.1,
+    "seasonality_prior_scale": 10.0,
+    "seasonality_mode": "additive",
+    "holidays": "IN",
+}
+
+def build_prophet_model(config=None, **kwargs):
+    """
+    Builds an unfitted Prophet model from a config dict. Extra keyword arguments
+    (e.g. uncertainty_samples) are passed straight to Prophet.
+    """
+    config = {**DEFAULT_PROPHET_CONFIG, **(config or {})}
+    model = Prophet(
+        yearly_seasonality=True,
+        weekly_seasonality=True,
+        daily_seasonality=False,
+        seasonality_mode=config["seasonality_mode"],
+        changepoint_prior_scale=config["changepoint_prior_scale"],
+        seasonality_prior_scale=config["seasonality_prior_scale"],
+        **kwargs
+    )
+    if config["holidays"]:
+        model.add_country_holidays(country_name=config["holidays"])
+    return model
+
+def station_config_path(clean_name, forecast_folder=FORECAST_FOLDER):
+    return Path(forecast_folder) / clean_name / f"{clean_name}_best_config.json"
+
+def load_station_config(clean_name, forecast_folder=FORECAST_FOLDER):
+    """Returns the tuned config for a station, falling back to the defaults."""
+    path = station_config_path(clean_name, forecast_folder)
+    if not path.exists():
+        return dict(DEFAULT_PROPHET_CONFIG)
+
+    with open(path) as f:
+        saved = json.load(f)
+    return {key: saved.get(key, default) for key, default in DEFAULT_PROPHET_CONFIG.items()}
+
+def save_station_config(clean_name, config, forecast_folder=FORECAST_FOLDER, **metadata):
+    """Writes a station's best config, plus any metadata such as its CV score, as JSON."""
+    path = station_config_path(clean_name, forecast_folder)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({**config, **metadata}, f, indent=2)
+    return path
@@ -0,0 +1,100 @@
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.neighbors import BallTree
+from logging_util import setup_logger
+
+# === Setup Logging ===
+logger = setup_logger("spatial_index", "spatial_index.log")
+
+# === Configuration ===
+LOCATIONS_PATH = "data/locations.csv"
+FORECAST_FOLDER = "outputs/forecasts_prophet"
+FORECAST_DAYS = 90
+EARTH_RADIUS_KM = 6371.0088
+
+class StationIndex:
+    """
+    Ball tree over station coordinates using the haversine metric, so nearest-station
+    and radius queries do not have to scan every station.
+    """
+
+    def __init__(self, stations):
+        self.stations = stations.reset_index(drop=True)
+        coords = np.radians(self.stations[["latitude", "longitude"]].to_numpy())
+        self.tree = BallTree(coords, metric="haversine")
+
+    @classmethod
+    def from_locations(cls, locations_path=LOCATIONS_PATH):
+        """Builds the index from locations.csv, one entry per station name."""
+        df = pd.read_csv(locations_path)
+        stations = (
+            df[["name", "coordinates.latitude", "coordinates.longitude"]]
+            .dropna()
+            .drop_duplicates(subset="name")
+            .rename(columns={"coordinates.latitude": "latitude", "coordinates.longitude": "longitude"})
+        )
+        logger.info(f"Built station index with {len(stations)} stations from {locations_path}")
+        return cls(stations)
+
+    def _point(self, latitude, longitude):
+        return np.radians([[latitude, longitude]])
+
+    def nearest(self, latitude, longitude, k=1):
+        """Returns the k nearest stations with a distance_km column, closest first."""
+        k = min(k, len(self.stations))
+        dist, idx = self.tree.query(self._point(latitude, longitude), k=k)
+        result = self.stations.iloc[idx[0]].copy()
+        result["distance_km"] = dist[0] * EARTH_RADIUS_KM
+        return result.reset_index(drop=True)
+
+    def within_radius(self, latitude, longitude, radius_km):
+        """Returns all stations within radius_km, closest first."""
+        idx, dist = self.tree.query_radius(
+            self._point(latitude, longitude), r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True, sort_results=True
+        )
+        result = self.stations.iloc[idx[0]].copy()
+        result["distance_km"] = dist[0] * EARTH_RADIUS_KM
+        return result.reset_index(drop=True)
+
+    def neighbours(self, station, radius_km, k=None):
+        """Returns other stations within radius_km of the named station, closest first."""
+        row = self.stations[self.stations["name"] == station]
+        if row.empty:
+            logger.warning(f"Station {station} not found in spatial index")
+            return self.stations.iloc[0:0].assign(distance_km=np.nan)
+        latitude, longitude = row.iloc[0][["latitude", "longitude"]]
+        result = self.within_radius(latitude, longitude, radius_km)
+        result = result[result["name"] != station].reset_index(drop=True)
+        return result if k is None else result.head(k)
+
+def forecast_for_location(latitude, longitude, index=None, forecast_folder=FORECAST_FOLDER):
+    """
+    Returns (station row, forecast DataFrame) for the station nearest to the given
+    coordinates, or (station row, None) if that station has no forecast yet.
+    """
+    index = index or StationIndex.from_locations()
+    station = index.nearest(latitude, longitude, k=1).iloc[0]
+    clean_name = station["name"].replace(" ", "_").replace("/", "_")
+    forecast_path = Path(forecast_folder) / clean_name / f"{clean_name}_forecast.csv"
+
+    if not forecast_path.exists():
+        logger.warning(f"No forecast found for nearest station {station['name']} at {forecast_path}")
+        return station, None
+
+    logger.info(f"Nearest station to ({latitude}, {longitude}) is {station['name']} ({station['distance_km']:.1f} km)")
+    return station, pd.read_csv(forecast_path, parse_dates=["ds"])
+
+# === Run if used standalone ===
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python scripts/spatial_index.py <latitude> <longitude>")
+        sys.exit(1)
+
+    lat, lon = float(sys.argv[1]), float(sys.argv[2])
+    station, forecast = forecast_for_location(lat, lon)
+    print(f"Nearest station: {station['name']} ({station['distance_km']:.1f} km)")
+    if forecast is not None:
+        print(forecast[["ds", "yhat"]].tail(FORECAST_DAYS).to_string(index=False))
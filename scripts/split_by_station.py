@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 from pathlib import Path
 import os
 from logging_util import setup_logger
@@ -9,6 +10,105 @@ logger = setup_logger("split_by_station", "split_by_station.log")
 # === Configuration ===
 INPUT_FILE = "data/cleaned_openaq.csv"
 OUTPUT_FOLDER = "data/stations"
+AQI_COLS = [
+    'value', 'summary.min', 'summary.q02', 'summary.q25', 'summary.median',
+    'summary.q75', 'summary.q98', 'summary.max', 'summary.avg', 'summary.sd'
+]
+
+# === Imputation settings ===
+# "time": time interpolation across every gap
+# "neighbour": gaps longer than LONG_GAP_DAYS are filled with an inverse-distance
+# weighted average of neighbouring stations, each rescaled to this station's level;
+# shorter gaps are time interpolated
+IMPUTATION_MODE = os.getenv("IMPUTATION_MODE", "time")
+LONG_GAP_DAYS = 30
+NEIGHBOUR_RADIUS_KM = float(os.getenv("NEIGHBOUR_RADIUS_KM", "600"))
+MAX_NEIGHBOURS = int(os.getenv("MAX_NEIGHBOURS", "3"))
+# Minimum number of dates both stations observed before a neighbour's level ratio is trusted
+MIN_OVERLAP_DAYS = 30
+
+def long_gap_mask(series, min_length=LONG_GAP_DAYS):
+    """Flags missing values that belong to a run of more than min_length consecutive NaNs."""
+    is_missing = series.isna()
+    run_id = (~is_missing).cumsum()
+    run_length = is_missing.groupby(run_id).transform("sum")
+    return is_missing & (run_length > min_length)
+
+def impute_from_neighbours(station, df_station, daily_frames, index):
+    """
+    Fills long gaps in df_station from neighbouring stations' observed values on the
+    same date, weighting each neighbour by inverse distance. Each neighbour is first
+    scaled by the ratio of the two stations' means over the dates both observed, so
+    the neighbour contributes its day-to-day pattern rather than its own level.
+    """
+    # Filter to stations with data before limiting the count, so stations without
+    # readings do not use up the MAX_NEIGHBOURS slots
+    neighbours = index.neighbours(station, NEIGHBOUR_RADIUS_KM)
+    neighbours = neighbours[neighbours["name"].isin(daily_frames.keys())].head(MAX_NEIGHBOURS)
+    if neighbours.empty:
+        logger.info(f"No neighbours within {NEIGHBOUR_RADIUS_KM} km for station {station}")
+        return df_station
+
+    weights = 1.0 / np.maximum(neighbours["distance_km"].to_numpy(), 1.0)
+
+    for col in AQI_COLS:
+        if col not in df_station.columns:
+            continue
+        mask = long_gap_mask(df_station[col])
+        if not mask.any():
+            continue
+
+        # Level-adjusted neighbour values aligned to this station's dates
+        # (NaN where a neighbour has no reading or too little overlap to scale)
+        own = df_station[col]
+        columns = []
+        for name in neighbours["name"]:
+            other = daily_frames[name].get(col, pd.Series(dtype=float)).reindex(df_station.index)
+            overlap = own.notna() & other.notna()
+            other_mean = other[overlap].mean()
+            if overlap.sum() < MIN_OVERLAP_DAYS or not other_mean > 0:
+                logger.debug("Skipping neighbour %s for %s in station %s: %d overlapping days", name, col, station, int(overlap.sum()))
+                columns.append(np.full(len(other), np.nan))
+                continue
+            columns.append((other * (own[overlap].mean() / other_mean)).to_numpy())
+        values = np.column_stack(columns)
+
+        weight_sum = (~np.isnan(values) * weights).sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Dates where no neighbour has a reading come out as NaN and fall back to interpolation
+            estimate = np.nansum(values * weights, axis=1) / weight_sum
+
+        df_station.loc[mask, col] = estimate[mask.to_numpy()]
+        logger.debug("Neighbour-imputed %d long-gap values for %s in station %s", int(mask.sum()), col, station)
+
+    return df_station
+
+def build_daily_frame(df, station, date_col, station_col):
+    """Returns one station's readings grouped by date at daily frequency."""
+    df_station = df[df[station_col] == station].copy()
+
+    # Set datetime index
+    df_station.set_index(date_col, inplace=True)
+
+    # Step 1: Group by date (to remove duplicates)
+    df_station = df_station.groupby(df_station.index).mean(numeric_only=True)
+
+    # Step 2: Set daily frequency
+    return df_station.asfreq("D")
+
+def interpolate_and_save(station, df_station, output_folder):
+    """Time-interpolates the remaining gaps and writes the station file."""
+    # Step 3: Interpolate missing values
+    for col in AQI_COLS:
+        if col in df_station.columns:
+            df_station[col] = df_station[col].interpolate(method="time")
+            logger.debug("Interpolated missing values for %s in station %s", col, station)
+
+    # Step 4: Save cleaned & interpolated file
+    clean_name = station.replace(" ", "_").replace("/", "_")
+    output_path = Path(output_folder) / f"{clean_name}.csv"
+    df_station.to_csv(output_path)
+    logger.info(f"Successfully saved station data to {output_path}")
 
 def split_by_station(input_file=INPUT_FILE, date_col="to_local_date", station_col="name", output_folder=OUTPUT_FOLDER):
     """
@@ -26,40 +126,37 @@ def split_by_station(input_file=INPUT_FILE, date_col="to_local_date", station_co
         # === Create output folder ===
         os.makedirs(output_folder, exist_ok=True)
 
-        # === Loop through unique station names ===
-        for station in df[station_col].dropna().unique():
-            try:
-                logger.info(f"Processing station: {station}")
-
-                df_station = df[df[station_col] == station].copy()
-
-                # Set datetime index
-                df_station.set_index(date_col, inplace=True)
-
-                # Step 1: Group by date (to remove duplicates)
-                df_station = df_station.groupby(df_station.index).mean(numeric_only=True)
-
-                # Step 2: Set daily frequency
-                df_station = df_station.asfreq("D")
-
-                # Step 3: Interpolate missing values
-                aqi_cols = [
-                    'value', 'summary.min', 'summary.q02', 'summary.q25', 'summary.median',
-                    'summary.q75', 'summary.q98', 'summary.max', 'summary.avg', 'summary.sd'
-                ]
-                for col in aqi_cols:
-                    if col in df_station.columns:
-                        df_station[col] = df_station[col].interpolate(method="time")
-                        logger.info(f"Interpolated missing values for {col} in station {station}")
-
-                # Step 4: Save cleaned & interpolated file
-                clean_name = station.replace(" ", "_").replace("/", "_")
-                output_path = Path(output_folder) / f"{clean_name}.csv"
-                df_station.to_csv(output_path)
-                logger.info(f"Successfully saved station data to {output_path}")
-
-            except Exception as e:
-                logger.error(f"Error processing station {station}: {e}")
+        stations = df[station_col].dropna().unique()
+
+        if IMPUTATION_MODE == "neighbour":
+            # Imported here so the default mode does not need scikit-learn
+            from spatial_index import StationIndex, LOCATIONS_PATH
+            index = StationIndex.from_locations(LOCATIONS_PATH)
+
+            # === Build daily frames for all stations first, so neighbours are available ===
+            daily_frames = {}
+            for station in stations:
+                try:
+                    logger.info(f"Processing station: {station}")
+                    daily_frames[station] = build_daily_frame(df, station, date_col, station_col)
+                except Exception as e:
+                    logger.error(f"Error processing station {station}: {e}")
+
+            for station, df_station in daily_frames.items():
+                try:
+                    df_station = impute_from_neighbours(station, df_station.copy(), daily_frames, index)
+                    interpolate_and_save(station, df_station, output_folder)
+                except Exception as e:
+                    logger.error(f"Error processing station {station}: {e}")
+        else:
+            # === Process and save one station at a time ===
+            for station in stations:
+                try:
+                    logger.info(f"Processing station: {station}")
+                    df_station = build_daily_frame(df, station, date_col, station_col)
+                    interpolate_and_save(station, df_station, output_folder)
+                except Exception as e:
+                    logger.error(f"Error processing station {station}: {e}")
 
         logger.info("All stations saved successfully!")
 
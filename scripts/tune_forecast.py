@@ -0,0 +1,148 @@
+import itertools
+import os
+import random
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from prophet.diagnostics import generate_cutoffs
+from logging_util import setup_logger
+from prophet_config import build_prophet_model, save_station_config, CV_INITIAL, CV_PERIOD, CV_HORIZON
+
+# === Setup Logging ===
+logger = setup_logger("tune_forecast", "tune_forecast.log")
+
+# === Configuration ===
+STATION_FOLDER = "data/stations"
+FORECAST_FOLDER = "outputs/forecasts_prophet"
+
+# === Search settings ===
+# "grid" tries every combination in PARAM_GRID, "random" samples N_RANDOM_CANDIDATES of them
+SEARCH_MODE = os.getenv("TUNING_SEARCH", "grid")
+N_RANDOM_CANDIDATES = 12
+RANDOM_SEED = 42
+MAX_WORKERS = int(os.getenv("TUNING_WORKERS", str(os.cpu_count() or 1)))
+
+PARAM_GRID = {
+    "changepoint_prior_scale": [0.01, 0.05, 0.1, 0.5],
+    "seasonality_prior_scale": [1.0, 10.0],
+    "seasonality_mode": ["additive", "multiplicative"],
+    "holidays": ["IN", None],
+}
+
+# Candidates are scored on the first PRUNE_AFTER_FOLDS cutoffs, then after every
+# further fold any candidate with RMSE above best * (1 + PRUNE_TOLERANCE) is dropped
+PRUNE_AFTER_FOLDS = 2
+PRUNE_TOLERANCE = 0.25
+
+def evaluate_fold(candidate_id, config, df, cutoff, horizon):
+    """Fits one candidate on data up to the cutoff and returns its squared error over the horizon."""
+    train = df[df["ds"] <= cutoff]
+    test = df[(df["ds"] > cutoff) & (df["ds"] <= cutoff + horizon)]
+
+    # Intervals are not needed for scoring, so skip the uncertainty simulation
+    model = build_prophet_model(config, uncertainty_samples=0)
+    model.fit(train)
+    yhat = model.predict(test[["ds"]])["yhat"].to_numpy()
+    return candidate_id, float(np.sum((test["y"].to_numpy() - yhat) ** 2)), len(test)
+
+def generate_candidates(mode=SEARCH_MODE):
+    """Returns the list of config dicts to evaluate."""
+    keys = list(PARAM_GRID)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*PARAM_GRID.values())]
+
+    if mode == "grid":
+        return grid
+    if mode == "random":
+        return random.Random(RANDOM_SEED).sample(grid, min(N_RANDOM_CANDIDATES, len(grid)))
+    raise ValueError(f"Unknown TUNING_SEARCH '{mode}'. Expected 'grid' or 'random'.")
+
+def tune_station(station_file, pool):
+    try:
+        station_name = Path(station_file).stem.replace("_", " ")
+        clean_name = Path(station_file).stem
+        logger.info(f"Tuning Prophet config for {station_name}...")
+
+        df = pd.read_csv(station_file, parse_dates=["to_local_date"])
+        df = df[["to_local_date", "summary.avg"]].dropna()
+        df.columns = ["ds", "y"]
+        if df.empty:
+            logger.warning(f"No data available for {station_name}. Skipping...")
+            return
+
+        # The same cutoffs are used for every candidate
+        horizon = pd.Timedelta(CV_HORIZON)
+        try:
+            cutoffs = generate_cutoffs(df, horizon, pd.Timedelta(CV_INITIAL), pd.Timedelta(CV_PERIOD))
+        except ValueError as e:
+            logger.warning(f"Not enough history to tune {station_name}: {e}")
+            return
+        cutoffs = sorted(cutoffs)
+
+        candidates = generate_candidates()
+        sse = np.zeros(len(candidates))
+        counts = np.zeros(len(candidates))
+        alive = list(range(len(candidates)))
+        logger.info(f"{station_name}: {len(candidates)} candidates over {len(cutoffs)} cutoffs")
+
+        # Fold rounds: the early cutoffs together, then one cutoff at a time
+        rounds = [cutoffs[:PRUNE_AFTER_FOLDS]] + [[c] for c in cutoffs[PRUNE_AFTER_FOLDS:]]
+
+        for round_number, round_cutoffs in enumerate(rounds, start=1):
+            tasks = [
+                (i, pool.submit(evaluate_fold, i, candidates[i], df, cutoff, horizon))
+                for i in alive for cutoff in round_cutoffs
+            ]
+            for i, future in tasks:
+                try:
+                    _, fold_sse, fold_count = future.result()
+                except Exception as e:
+                    # A failed fit prunes only that candidate, not the whole search
+                    if np.isfinite(sse[i]):
+                        logger.warning(f"{station_name}: candidate {candidates[i]} failed and is pruned: {e}")
+                    sse[i] = np.inf
+                    continue
+                sse[i] += fold_sse
+                counts[i] += fold_count
+
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rmse = np.sqrt(sse[alive] / counts[alive])
+            finite = np.isfinite(rmse)
+            if not finite.any():
+                alive = []
+                break
+
+            threshold = rmse[finite].min() * (1 + PRUNE_TOLERANCE) if round_number < len(rounds) else np.inf
+            survivors = [i for i, score in zip(alive, rmse) if np.isfinite(score) and score <= threshold]
+            if len(survivors) < len(alive):
+                logger.info(f"{station_name}: round {round_number} pruned {len(alive) - len(survivors)} candidates")
+            alive = survivors
+
+        if not alive:
+            logger.warning(f"All candidates failed for {station_name}. No config saved.")
+            return
+
+        rmse = np.sqrt(sse[alive] / counts[alive])
+        best = alive[int(np.argmin(rmse))]
+        best_rmse = float(rmse.min())
+
+        config_path = save_station_config(
+            clean_name, candidates[best], FORECAST_FOLDER,
+            cv_rmse=best_rmse, n_cutoffs=len(cutoffs), n_candidates=len(candidates)
+        )
+        logger.info(f"Best config for {station_name}: {candidates[best]} (RMSE {best_rmse:.2f}) saved to {config_path}")
+        print(f"{station_name} - best config: {candidates[best]}, RMSE: {best_rmse:.2f}")
+
+    except Exception as e:
+        logger.error(f"Error tuning {station_file}: {e}")
+        print(f"Error tuning {station_file}: {e}")
+
+if __name__ == "__main__":
+    station_files = list(Path(STATION_FOLDER).glob("*.csv"))
+
+    # One pool for all stations, so worker processes and the prophet import are reused
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for file in station_files:
+            tune_station(file, pool)
+
+    print("Tuning complete for all stations!")